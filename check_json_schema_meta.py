@@ -2,17 +2,676 @@
 """Pre-commit hook to validate JSON Schema references in JSON files."""
 
 import argparse
+import contextlib
+import functools
+import hashlib
+import io
 import json
+import mmap
 import os
+import re
+import sqlite3
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
-import jsonschema
-from check_jsonschema.schema_loader import SchemaLoader
+import orjson
+
+# jsonschema and check-jsonschema take most of the startup time, so they are
+# only imported once a file actually needs to be validated
+if TYPE_CHECKING:
+    import jsonschema
+    from check_jsonschema.formats import FormatOptions
+    from check_jsonschema.schema_loader import SchemaLoader
+    from referencing._core import Resolver
+
+# Used to group files by $schema without parsing them, see _shard_by_schema
+_SCHEMA_SNIFF_RE = re.compile(rb'"\$schema"\s*:\s*"([^"]*)"')
+_SCHEMA_SNIFF_SIZE = 4096
+
+# Leading bytes looked at before parsing a document, see _check_json_stream
+_HEAD_SNIFF_SIZE = 64
+
+# Bytes a JSON value can start with, once leading whitespace is skipped. NaN
+# and Infinity are accepted, like the json module does.
+_JSON_VALUE_START = b'{["-0123456789tfnNI'
+
+# Integer literals this long may not fit in 64 bits, see _parse_json
+_WIDE_INT_RE = re.compile(rb"\d{20,}")
+
+# Files at least this large are memory-mapped rather than read, see _load_json
+_MMAP_THRESHOLD = 64 * 1024
+
+# Maximum number of passing results remembered across runs, see _flush_results_cache
+_RESULTS_CACHE_LIMIT = 100_000
+
+# Fewer files than this are checked serially even with --jobs, since starting
+# worker processes (and reloading schemas in each) costs more than it saves
+_POOL_MIN_FILES = 4
+
+
+def _parse_json(contents: Union[bytes, memoryview]) -> Any:
+    """
+    Parse a JSON document, with orjson unless the json module would differ.
+
+    orjson reads integers too wide for 64 bits as floats, and rejects NaN,
+    Infinity and lone surrogates, so such documents are parsed with the json
+    module instead, which reads them exactly.
+    """
+    if not _WIDE_INT_RE.search(contents):
+        try:
+            return orjson.loads(contents)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(bytes(contents))
+
+
+def _load_json(f: BinaryIO) -> Tuple[Any, bytes]:
+    """
+    Parse an open JSON file and compute the SHA-256 digest of its contents.
+
+    The file is read from its current position to the end. Large files are
+    memory-mapped so the parser reads them in place, instead of first copying
+    the whole file into a bytes object. In-memory streams, which have no file to
+    map, are read directly.
+    """
+    try:
+        size = os.fstat(f.fileno()).st_size - f.tell()
+    except io.UnsupportedOperation:
+        size = 0
+    if size < _MMAP_THRESHOLD:
+        contents = f.read()
+        return _parse_json(contents), hashlib.sha256(contents).digest()
+
+    # Maps must start at a multiple of the page size, so the map covers the
+    # whole file and the view skips what comes before the current position
+    start = f.tell()
+    f.seek(0, io.SEEK_END)
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # The views must be released before the map can be closed
+        with memoryview(mm) as whole, whole[start:] as view:
+            return _parse_json(view), hashlib.sha256(view).digest()
+
+
+# Passing results seen during this run, written back in one transaction by
+# _flush_results_cache. Values tell whether the result was new to the cache.
+_pending_results: Dict[Tuple[bytes, bytes], bool] = {}
+
+
+def _results_cache_path() -> str:
+    """Return the path of the cache of passing results."""
+    cache_dir = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_dir, "check-json-schema-meta", "results.sqlite")
+
+
+@functools.lru_cache(maxsize=None)
+def _open_results_cache(path: str, pid: int) -> Optional[sqlite3.Connection]:
+    """
+    Open the cache of passing results, or return None if it is unavailable.
+
+    Connections are cached per process id, since a SQLite connection must not
+    be used by the worker processes forked for --jobs.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        connection = sqlite3.connect(path, timeout=10)
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS passed ("
+                "file_hash BLOB, schema_hash BLOB, used_at REAL, "
+                "PRIMARY KEY (file_hash, schema_hash))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS passed_used_at ON passed (used_at)"
+            )
+    except (OSError, sqlite3.Error):
+        return None
+    return connection
+
+
+def _is_known_pass(file_digest: bytes, schema_digest: bytes) -> bool:
+    """Check whether a file already passed validation against a schema."""
+    connection = _open_results_cache(_results_cache_path(), os.getpid())
+    if connection is None:
+        return False
+    try:
+        row = connection.execute(
+            "SELECT 1 FROM passed WHERE file_hash = ? AND schema_hash = ?",
+            (file_digest, schema_digest),
+        ).fetchone()
+    except sqlite3.Error:
+        return False
+    if row is None:
+        return False
+    # Mark the result as recently used, so pruning keeps it
+    _pending_results.setdefault((file_digest, schema_digest), False)
+    return True
+
+
+def _record_pass(file_digest: bytes, schema_digest: bytes) -> None:
+    """Remember that a file passed validation against a schema."""
+    _pending_results[file_digest, schema_digest] = True
+
+
+def _flush_results_cache() -> None:
+    """
+    Write the passing results of this run to the cache in a single transaction.
+
+    The least recently used results beyond the size limit are only pruned when
+    new results were added, since merely reusing results cannot grow the cache.
+    """
+    if not _pending_results:
+        return
+    results = list(_pending_results.items())
+    _pending_results.clear()
+    connection = _open_results_cache(_results_cache_path(), os.getpid())
+    if connection is None:
+        return
+    now = time.time()
+    # The cache is only an optimization, so failing to write to it is harmless
+    with contextlib.suppress(sqlite3.Error), connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO passed VALUES (?, ?, ?)",
+            [
+                (file_digest, schema_digest, now)
+                for (file_digest, schema_digest), _ in results
+            ],
+        )
+        if any(new for _, new in results):
+            connection.execute(
+                "DELETE FROM passed WHERE rowid IN (SELECT rowid FROM passed "
+                "ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (_RESULTS_CACHE_LIMIT,),
+            )
+
+
+@functools.lru_cache(maxsize=None)
+def _schema_load_errors() -> Tuple[Type[BaseException], ...]:
+    """
+    Return the errors reported for a file whose schema cannot be loaded.
+
+    check-jsonschema's own parse errors (SchemaParseError, UnsupportedUrlScheme,
+    ParseError) are all ValueErrors, and missing local schemas raise OSError.
+    """
+    import jsonschema
+    from check_jsonschema.cachedownloader import FailedDownloadError
+
+    return (
+        OSError,
+        ValueError,
+        FailedDownloadError,
+        jsonschema.SchemaError,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _ref_resolution_errors() -> Tuple[Type[BaseException], ...]:
+    """
+    Return the errors raised during validation when a $ref cannot be resolved.
+
+    These mirror the ones handled by check-jsonschema's SchemaChecker.
+    """
+    import referencing.exceptions
+
+    return (
+        referencing.exceptions.NoSuchResource,
+        referencing.exceptions.Unretrievable,
+        referencing.exceptions.Unresolvable,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _builtin_metaschemas() -> Dict[str, Dict[str, Any]]:
+    """
+    Return the meta-schemas bundled with jsonschema.
+
+    They are keyed by their URI without the empty fragment, so documents which
+    are themselves schemas validate offline.
+    """
+    import jsonschema
+
+    return {
+        validator.ID_OF(validator.META_SCHEMA).rstrip("#"): validator.META_SCHEMA
+        for validator in (
+            jsonschema.Draft3Validator,
+            jsonschema.Draft4Validator,
+            jsonschema.Draft6Validator,
+            jsonschema.Draft7Validator,
+            jsonschema.Draft201909Validator,
+            jsonschema.Draft202012Validator,
+        )
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _vendored_schemas() -> Dict[str, str]:
+    """
+    Return the schemas vendored by check-jsonschema, keyed by their upstream URL.
+
+    These are the schemas behind check-jsonschema's own hooks (renovate,
+    dependabot, GitHub workflows, ...). Schemas whose hooks need a data transform
+    are left out, since their documents are not validated as plain JSON.
+    """
+    from check_jsonschema.catalog import SCHEMA_CATALOG
+
+    return {
+        entry["url"]: f"vendor.{name}"
+        for name, entry in SCHEMA_CATALOG.items()
+        if "--data-transform" not in entry["hook_config"].get("add_args", [])
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _use_exact_json_parser() -> None:
+    """
+    Make check-jsonschema parse JSON schemas with _parse_json.
+
+    check-jsonschema parses JSON with orjson whenever it is installed, which it
+    always is alongside this hook, so integer bounds wider than 64 bits in a
+    schema would become floats. Its parser sets copy the default parsers when
+    created, so this must run before any schema loader is.
+    """
+    from check_jsonschema.parsers import DEFAULT_LOAD_FUNC_BY_TAG
+
+    DEFAULT_LOAD_FUNC_BY_TAG["json"] = lambda stream: _parse_json(stream.read())
+
+
+@functools.lru_cache(maxsize=None)
+def _get_schema_loader(schema_ref: str, disable_cache: bool = False) -> "SchemaLoader":
+    """
+    Create the loader for a $schema reference.
+
+    Loaders are cached by schema reference, so files sharing the same $schema
+    only fetch it once per run. Remote schemas are also kept in check-jsonschema's
+    on-disk cache, so later runs skip the download unless the schema changed
+    upstream.
+
+    Standard JSON Schema meta-schemas are never downloaded, since jsonschema
+    already bundles them. Neither are the well-known schemas vendored by
+    check-jsonschema, which are used as of the installed check-jsonschema release.
+
+    Args:
+        schema_ref: The (already expanded) $schema reference
+        disable_cache: If True, always download remote schemas and their $refs.
+
+    Returns:
+        A loader for the referenced schema
+    """
+    from check_jsonschema.schema_loader import BuiltinSchemaLoader, SchemaLoader
+
+    _use_exact_json_parser()
+    metaschemas = _builtin_metaschemas()
+    if schema_ref.rstrip("#") in metaschemas:
+
+        class _MetaSchemaLoader(BuiltinSchemaLoader):
+            """Load a meta-schema bundled with jsonschema instead of downloading it."""
+
+            def get_schema(self) -> Dict[str, Any]:
+                return metaschemas[self.schema_name.rstrip("#")]
+
+        return _MetaSchemaLoader(schema_ref)
+
+    vendored = _vendored_schemas().get(schema_ref)
+    if vendored is not None:
+        # Relative $refs still resolve against the upstream URL
+        return BuiltinSchemaLoader(vendored, base_uri=schema_ref)
+    return SchemaLoader(schema_ref, disable_cache=disable_cache)
+
+
+def _dump_schema(schema: Any) -> bytes:
+    """
+    Serialize a schema, or part of one, to canonical JSON for hashing.
+
+    orjson cannot serialize integers wider than 64 bits, which YAML schemas (and
+    JSON ones parsed by the json module) may contain, so those use json instead.
+    """
+    try:
+        return orjson.dumps(
+            schema, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        )
+    except orjson.JSONEncodeError:
+        return json.dumps(schema, sort_keys=True).encode()
+
+
+def _hash_referenced_schemas(
+    digest: "hashlib._Hash",
+    schema_ref: str,
+    schema: Dict[str, Any],
+    disable_cache: bool,
+) -> None:
+    """
+    Add every document reachable from a schema through $ref to a digest.
+
+    References are resolved the way check-jsonschema resolves them during
+    validation, so relative paths, remote documents and their on-disk cache all
+    behave the same. References which cannot be resolved are skipped: a file
+    validated against them fails, so no passing result is recorded for them.
+    """
+    from check_jsonschema.parsers import ParserSet
+    from check_jsonschema.schema_loader.resolver import make_reference_registry
+    from jsonschema_specifications import REGISTRY as SPECIFICATIONS
+    from referencing.jsonschema import DRAFT202012, specification_with
+
+    loader = _get_schema_loader(schema_ref, disable_cache)
+    registry = SPECIFICATIONS.combine(
+        make_reference_registry(
+            ParserSet(), loader.get_schema_retrieval_uri(), schema, disable_cache
+        )
+    )
+    dialect = schema.get("$schema")
+    specification = specification_with(
+        dialect if isinstance(dialect, str) else "", default=DRAFT202012
+    )
+
+    # Nodes are tracked by identity: the retrieved documents are cached by the
+    # registry, so a $ref cycle leads back to an object that was already walked
+    seen: Dict[int, Any] = {}
+    stack: List[Tuple[Any, "Resolver[Any]"]] = [
+        (schema, registry.resolver_with_root(specification.create_resource(schema)))
+    ]
+    while stack:
+        node, resolver = stack.pop()
+        if isinstance(node, list):
+            stack.extend((item, resolver) for item in reversed(node))
+            continue
+        if not isinstance(node, dict) or id(node) in seen:
+            continue
+        seen[id(node)] = node
+
+        # Subschemas with their own $id change the base of the $refs inside them.
+        # Objects that merely have an "$id" property (like the "properties" of a
+        # meta-schema) are not subschemas.
+        ids = [node[key] for key in ("$id", "id") if key in node]
+        if node is not schema and ids and all(isinstance(i, str) for i in ids):
+            resolver = resolver.in_subresource(specification.create_resource(node))
+
+        for keyword in ("$ref", "$dynamicRef", "$recursiveRef"):
+            ref = node.get(keyword)
+            if not isinstance(ref, str):
+                continue
+            try:
+                resolved = resolver.lookup(ref)
+            except _ref_resolution_errors():
+                continue
+            if id(resolved.contents) not in seen:
+                digest.update(ref.encode())
+                digest.update(_dump_schema(resolved.contents))
+                stack.append((resolved.contents, resolved.resolver))
+
+        stack.extend((value, resolver) for value in reversed(list(node.values())))
+
+
+@functools.lru_cache(maxsize=None)
+def _format_options() -> "FormatOptions":
+    """Return the format checking options validators are built with."""
+    from check_jsonschema.formats import FormatOptions
+    from check_jsonschema.regex_variants import (
+        RegexImplementation,
+        RegexVariantName,
+    )
+
+    return FormatOptions(regex_impl=RegexImplementation(RegexVariantName.default))
+
+
+@functools.lru_cache(maxsize=None)
+def _validation_environment() -> bytes:
+    """
+    Describe what decides whether a file passes, besides the schema itself.
+
+    Upgrading a validation library, or installing a package which adds checks
+    for a format, can make validation stricter, so results recorded before must
+    not be reused.
+    """
+    from importlib import metadata
+
+    import jsonschema
+
+    versions = {}
+    for dist in (
+        "check-json-schema-meta",
+        "check-jsonschema",
+        "jsonschema",
+        "jsonschema-specifications",
+        "orjson",
+        "referencing",
+    ):
+        try:
+            versions[dist] = metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            versions[dist] = ""
+    format_opts = _format_options()
+    return orjson.dumps(
+        {
+            "versions": versions,
+            "formats": sorted(jsonschema.FormatChecker().checkers),
+            "format_enabled": format_opts.enabled,
+            "disabled_formats": list(format_opts.disabled_formats),
+            "regex_variant": format_opts.regex_impl.variant.value,
+        }
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_schema_digest(schema_ref: str, disable_cache: bool = False) -> Optional[bytes]:
+    """
+    Compute the SHA-256 digest identifying a $schema reference and its contents.
+
+    The reference itself is included because relative $refs resolve against it,
+    and so is every document pulled in through $ref, so editing a shared
+    definitions file invalidates the results recorded against it. So are the
+    library versions and format checks validation depends on.
+
+    Returns:
+        The digest, or None if the schema cannot be serialized (e.g. YAML keys
+        of mixed types), in which case files are validated without the cache
+    """
+    schema = _get_schema_loader(schema_ref, disable_cache).get_schema()
+    digest = hashlib.sha256(_validation_environment())
+    digest.update(schema_ref.encode())
+    try:
+        digest.update(_dump_schema(schema))
+        _hash_referenced_schemas(digest, schema_ref, schema, disable_cache)
+    except (TypeError, ValueError):
+        return None
+    return digest.digest()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_validator(
+    schema_ref: str, disable_cache: bool = False
+) -> "jsonschema.protocols.Validator":
+    """
+    Build a validator for the schema referenced by $schema.
+
+    Validators are cached by schema reference, so files sharing the same $schema
+    only compile it once per run.
+
+    Args:
+        schema_ref: The (already expanded) $schema reference
+        disable_cache: If True, always download remote schemas and their $refs.
+
+    Returns:
+        A validator for the referenced schema
+    """
+    # Use SchemaLoader's get_validator method which handles $ref resolution properly
+    # and avoids the deprecation warning
+    format_opts = _format_options()
+    # SchemaLoader ignores path and instance_doc, which keeps the validator
+    # independent of the file being validated and therefore safe to share
+    return _get_schema_loader(schema_ref, disable_cache).get_validator(
+        path=schema_ref,
+        instance_doc={},
+        format_opts=format_opts,
+        regex_impl=format_opts.regex_impl,
+        fill_defaults=False,
+    )
+
+
+def _check_json_file(
+    file_path: Union[str, Path],
+    strict: bool = False,
+    expand_env_vars: bool = False,
+    disable_cache: bool = False,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Validate a single JSON file's $schema reference without printing.
+
+    This also runs in worker processes when --jobs is used, so it only takes and
+    returns picklable values.
+
+    Args:
+        file_path: Path to the JSON file to validate
+        strict: If True, fail on missing $schema. If False, gracefully skip.
+        expand_env_vars: If True, expand environment variables in $schema paths.
+        disable_cache: If True, do not use the on-disk caches for remote schemas
+            and passing results.
+
+    Returns:
+        A (passed, message) tuple, where message is None for skipped files
+    """
+    # Opening the file directly avoids a separate existence check
+    try:
+        f = open(file_path, "rb")
+    except FileNotFoundError:
+        return False, f"❌ {file_path}: File not found"
+    except OSError as e:
+        return False, f"❌ {file_path}: {e}"
+
+    with f:
+        return _check_json_stream(
+            f,
+            file_path,
+            strict=strict,
+            expand_env_vars=expand_env_vars,
+            disable_cache=disable_cache,
+        )
+
+
+def _check_json_stream(
+    f: BinaryIO,
+    file_path: Union[str, Path],
+    strict: bool = False,
+    expand_env_vars: bool = False,
+    disable_cache: bool = False,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Validate the $schema reference of a JSON document read from a binary stream.
+
+    This is the part of _check_json_file which does not touch the filesystem, so
+    documents held in memory (e.g. an io.BytesIO) can be checked as well. The
+    stream is read from its current position and left open.
+
+    Args:
+        f: Binary stream containing the JSON document
+        file_path: Name of the document, only used in messages
+        strict: If True, fail on missing $schema. If False, gracefully skip.
+        expand_env_vars: If True, expand environment variables in $schema paths.
+        disable_cache: If True, do not use the on-disk caches for remote schemas
+            and passing results.
+
+    Returns:
+        A (passed, message) tuple, where message is None for skipped files
+    """
+    try:
+        head = f.read(_HEAD_SNIFF_SIZE)
+        f.seek(-len(head), io.SEEK_CUR)
+        first = head.lstrip()[:1]
+        # Files which cannot be JSON, e.g. YAML or XML passed to the hook, are
+        # rejected from their first byte without running the parser
+        if first and first not in _JSON_VALUE_START:
+            return (
+                False,
+                f"❌ {file_path}: Invalid JSON - unexpected character "
+                f"{first.decode('latin-1')!r} at the start of the document",
+            )
+        # In strict mode a top-level array fails whatever its contents, so it
+        # is rejected from its first bytes without being parsed
+        if strict and first == b"[":
+            return (
+                False,
+                f"❌ {file_path}: JSON array does not support '$schema' key",
+            )
+        # Files are parsed as JSON regardless of extension
+        data, file_digest = _load_json(f)
+    except ValueError as e:
+        # JSONDecodeError, or UnicodeDecodeError for bytes that are not UTF-8
+        return False, f"❌ {file_path}: Invalid JSON - {e}"
+    except OSError as e:
+        return False, f"❌ {file_path}: {e}"
+
+    # Handle case where JSON is an array (or a scalar) instead of an object
+    if not isinstance(data, dict):
+        if strict:
+            kind = "array" if isinstance(data, list) else "value"
+            return False, f"❌ {file_path}: JSON {kind} does not support '$schema' key"
+        else:
+            return True, None
+
+    # Remove $schema so it is not validated as a regular property. The parsed
+    # document is not shared, so it is popped in place instead of copied.
+    schema_ref = data.pop("$schema", None)
+    if not schema_ref:
+        if strict:
+            return False, f"❌ {file_path}: Missing '$schema' key"
+        else:
+            return True, None
+    if not isinstance(schema_ref, str):
+        return False, f"❌ {file_path}: '$schema' must be a string"
+
+    # Expand environment variables in the schema reference
+    if expand_env_vars:
+        schema_ref = os.path.expandvars(schema_ref)
+
+    passed_message = f"✅ {file_path}: Schema validation passed"
+
+    try:
+        # Skip files which already passed against this exact schema
+        schema_digest = None
+        if not disable_cache:
+            schema_digest = _get_schema_digest(schema_ref, disable_cache)
+        if schema_digest is not None and _is_known_pass(file_digest, schema_digest):
+            return True, passed_message
+
+        validator = _get_validator(schema_ref, disable_cache)
+    except _schema_load_errors() as e:
+        return False, f"❌ {file_path}: {e}"
+
+    try:
+        # Stop at the first error, like validate() does, but without raising it
+        error = next(validator.iter_errors(data), None)
+    except _ref_resolution_errors() as e:
+        return False, f"❌ {file_path}: Failed to resolve $ref - {e}"
+
+    if error is None:
+        if schema_digest is not None:
+            _record_pass(file_digest, schema_digest)
+        return True, passed_message
+
+    # Format validation error more clearly
+    if error.absolute_path:
+        path_str = ".".join(map(str, error.absolute_path))
+        return False, f"❌ {file_path}: Invalid value at '{path_str}' - {error.message}"
+    else:
+        return False, f"❌ {file_path}: Schema validation failed - {error.message}"
 
 
 def validate_json_file(
-    file_path: Path, strict: bool = False, expand_env_vars: bool = False
+    file_path: Path,
+    strict: bool = False,
+    expand_env_vars: bool = False,
+    disable_cache: bool = False,
 ) -> bool:
     """
     Validate a single JSON file's $schema reference.
@@ -21,82 +680,79 @@ def validate_json_file(
         file_path: Path to the JSON file to validate
         strict: If True, fail on missing $schema. If False, gracefully skip.
         expand_env_vars: If True, expand environment variables in $schema paths.
+        disable_cache: If True, do not use the on-disk caches for remote schemas
+            and passing results.
 
     Returns:
         True if validation passes, False otherwise
     """
+    passed, message = _check_json_file(
+        file_path, strict, expand_env_vars, disable_cache
+    )
+    _flush_results_cache()
+    if message:
+        print(message)
+    return passed
+
+
+def _check_batch(
+    file_paths: List[str], strict: bool, expand_env_vars: bool, disable_cache: bool
+) -> List[Tuple[bool, Optional[str]]]:
+    """
+    Check several command line arguments, in a worker process for --jobs.
+
+    Passing results are written to the cache once the whole batch is checked.
+
+    Returns:
+        A (passed, message) tuple per file, in the same order as file_paths
+    """
+    results = [
+        _check_json_file(file_path, strict, expand_env_vars, disable_cache)
+        for file_path in file_paths
+    ]
+    _flush_results_cache()
+    return results
+
+
+def _sniff_schema_ref(file_path: str) -> bytes:
+    """
+    Guess a file's $schema from its first few KiB, without parsing it.
+
+    This is only used to group files, so a wrong or missing guess merely costs
+    an extra schema load in some worker.
+    """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Handle case where JSON is an array instead of an object
-        if isinstance(data, list):
-            if strict:
-                print(f"❌ {file_path}: JSON array does not support '$schema' key")
-                return False
-            else:
-                return True
-
-        schema_ref = data.get("$schema")
-        if not schema_ref:
-            if strict:
-                print(f"❌ {file_path}: Missing '$schema' key")
-                return False
-            else:
-                return True
-
-        # Expand environment variables in the schema reference
-        if expand_env_vars:
-            schema_ref = os.path.expandvars(schema_ref)
-
-        # Load and validate the schema using SchemaLoader's built-in validator
-        schema_loader = SchemaLoader(schema_ref)
-
-        # Create a copy of data without $schema for validation
-        data_without_schema = {k: v for k, v in data.items() if k != "$schema"}
-
-        # Use SchemaLoader's get_validator method which handles $ref resolution properly
-        # and avoids the deprecation warning
-        from check_jsonschema.formats import FormatOptions
-        from check_jsonschema.regex_variants import (
-            RegexImplementation,
-            RegexVariantName,
-        )
+        with open(file_path, "rb") as f:
+            match = _SCHEMA_SNIFF_RE.search(f.read(_SCHEMA_SNIFF_SIZE))
+    except OSError:
+        return b""
+    return match.group(1) if match else b""
 
-        regex_impl = RegexImplementation(RegexVariantName.default)
-        validator = schema_loader.get_validator(
-            path=file_path,
-            instance_doc=data_without_schema,
-            format_opts=FormatOptions(regex_impl=regex_impl),
-            regex_impl=regex_impl,
-            fill_defaults=False,
-        )
 
-        validator.validate(data_without_schema)
+def _shard_by_schema(file_paths: List[str], jobs: int) -> List[List[int]]:
+    """
+    Split files into at most `jobs` shards of similar size.
 
-        print(f"✅ {file_path}: Schema validation passed")
-        return True
+    Files are ordered by $schema first, so files sharing a schema end up in the
+    same shard and each worker only loads the schemas its shard needs.
 
-    except json.JSONDecodeError as e:
-        print(f"❌ {file_path}: Invalid JSON - {e}")
-        return False
-    except jsonschema.ValidationError as e:
-        # Format validation error more clearly
-        if e.absolute_path:
-            path_str = ".".join(str(p) for p in e.absolute_path)
-            print(f"❌ {file_path}: Invalid value at '{path_str}' - {e.message}")
-        else:
-            print(f"❌ {file_path}: Schema validation failed - {e.message}")
-        return False
-    except Exception as e:
-        print(f"❌ {file_path}: {e}")
-        return False
+    Returns:
+        Lists of indices into file_paths, one per shard
+    """
+    order = sorted(
+        range(len(file_paths)), key=lambda i: _sniff_schema_ref(file_paths[i])
+    )
+    size = -(-len(order) // jobs)
+    return [order[start : start + size] for start in range(0, len(order), size)]
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     """
     Entry point for the pre-commit hook.
 
+    Args:
+        argv: Command line arguments, defaulting to sys.argv[1:]
+
     Returns:
         0 on success, 1 on failure
     """
@@ -106,6 +762,7 @@ def main() -> int:
 Usage examples:
   %(prog)s file1.json file2.json
   %(prog)s --strict *.json
+  %(prog)s --jobs 0 *.json
   %(prog)s --help
         """,
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -121,32 +778,55 @@ Usage examples:
         action="store_true",
         help="Expand environment variables in $schema paths (default: false)",
     )
-    args = parser.parse_args()
-
-    validation_results = []
-
-    for file_path in args.files:
-        path = Path(file_path)
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not cache downloaded schemas and passing results on disk "
+        "(default: false)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of files to validate in parallel, 0 for one per CPU "
+        "(default: 1, as pre-commit already runs hooks in parallel)",
+    )
+    args = parser.parse_args(argv)
 
-        if not path.exists():
-            print(f"❌ {file_path}: File not found")
-            validation_results.append(False)
-            continue
+    options = {
+        "strict": args.strict,
+        "expand_env_vars": args.expand_env_vars,
+        "disable_cache": args.no_cache,
+    }
+    # Overlapping globs can pass the same file more than once, so each distinct
+    # path is checked once and its result repeated for every occurrence
+    files = list(dict.fromkeys(args.files))
+    jobs = min(args.jobs or os.cpu_count() or 1, len(files))
 
-        # Try to parse as JSON regardless of extension
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                json.load(f)
-        except json.JSONDecodeError:
-            print(f"❌ {file_path}: Not a valid JSON file")
-            validation_results.append(False)
-            continue
+    # Results are collected in argument order, so output is deterministic
+    # regardless of which worker finishes first
+    if jobs > 1 and len(files) >= _POOL_MIN_FILES:
+        shards = _shard_by_schema(files, jobs)
+        by_index: Dict[int, Tuple[bool, Optional[str]]] = {}
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            batches = executor.map(
+                functools.partial(_check_batch, **options),
+                [[files[i] for i in shard] for shard in shards],
+            )
+            for shard, batch in zip(shards, batches):
+                by_index.update(zip(shard, batch))
+        unique_results = [by_index[i] for i in range(len(files))]
+    else:
+        unique_results = _check_batch(files, **options)
+    by_path = dict(zip(files, unique_results))
+    results = [by_path[file_path] for file_path in args.files]
 
-        validation_results.append(
-            validate_json_file(path, args.strict, args.expand_env_vars)
-        )
+    # Write all messages at once instead of paying for a print() per file
+    sys.stdout.write("".join(f"{message}\n" for _, message in results if message))
+    sys.stdout.flush()
 
-    return 0 if all(validation_results) else 1
+    return 0 if all(passed for passed, _ in results) else 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,20 @@
+"""Shared pytest fixtures for check_json_schema_meta tests."""
+
+from typing import Iterator
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def shared_cache(tmp_path_factory: pytest.TempPathFactory) -> Iterator[None]:
+    """
+    Keep downloaded schemas and passing results out of the user's cache.
+
+    The cache directory is shared by the whole session, so a remote schema (and
+    the documents it pulls in through $ref) is only downloaded by the first test
+    that needs it. Validators are already reused within the session through the
+    in-process caches of check_json_schema_meta.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
+        yield
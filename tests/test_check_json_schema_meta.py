@@ -1,195 +1,474 @@
 """Unit tests for check_json_schema_meta module."""
 
+import io
 import json
-import tempfile
+import mmap
 from pathlib import Path
+from typing import Any, Optional, Tuple
 from unittest.mock import patch
 
-from check_json_schema_meta import main, validate_json_file
+import pytest
+import requests
+import responses
+from check_jsonschema.schema_loader import SchemaLoader
+
+from check_json_schema_meta import (
+    _check_json_file,
+    _check_json_stream,
+    _get_schema_digest,
+    _get_schema_loader,
+    _get_validator,
+    _shard_by_schema,
+    main,
+    validate_json_file,
+)
+
+
+def _check_document(document: Any, **kwargs: bool) -> Tuple[bool, Optional[str]]:
+    """Check a JSON document (or raw bytes) in memory, without writing a file."""
+    if not isinstance(document, bytes):
+        document = json.dumps(document).encode()
+    return _check_json_stream(io.BytesIO(document), "test.json", **kwargs)
+
+
+# Documents shared by several tests, serialized once at import time
+_NO_SCHEMA = json.dumps({"name": "test"}).encode()
+_DRAFT07_STRING = json.dumps(
+    {"$schema": "http://json-schema.org/draft-07/schema#", "type": "string"}
+).encode()
+_NAME_ONLY_SCHEMA = json.dumps(
+    {
+        "$schema": "https://json-schema.org/draft/2019-09/schema",
+        "type": "object",
+        "properties": {"name": {"type": "string"}},
+        "additionalProperties": False,
+    }
+).encode()
+_OBJECT_SCHEMA = json.dumps({"type": "object"}).encode()
+# Refers to schema.json in the directory named by $SCHEMA_DIR
+_ENV_VAR_DOCUMENT = json.dumps(
+    {"$schema": "file:///${SCHEMA_DIR}/schema.json", "name": "test value"}
+).encode()
+# Served as a connection error by responses, see test_check_document
+_UNREACHABLE_SCHEMA_URL = "https://invalid-schema-url.com/nonexistent.json"
+_PERSON_DEFINITIONS = json.dumps(
+    {
+        "$schema": "https://json-schema.org/draft/2019-09/schema",
+        "$id": "https://example.com/definitions.json",
+        "definitions": {
+            "person": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "age": {"type": "integer", "minimum": 0},
+                },
+                "required": ["name", "age"],
+            }
+        },
+    }
+).encode()
+
+# (name, document, strict, expected) for documents which only need checking,
+# where strict=None means relying on the default
+CASES = [
+    (
+        "valid_json_with_schema",
+        {
+            "$schema": "http://json-schema.org/draft-07/schema#",
+            "type": "object",
+            "properties": {"name": {"type": "string"}},
+        },
+        None,
+        True,
+    ),
+    # Default behavior is to gracefully skip
+    ("json_without_schema", _NO_SCHEMA, None, True),
+    ("json_without_schema_non_strict", _NO_SCHEMA, False, True),
+    ("json_without_schema_strict", _NO_SCHEMA, True, False),
+    ("invalid_json", b"invalid json content", None, False),
+    ("invalid_utf8", b'{"name": "\xff"}', None, False),
+    # Accepted by the json module, although orjson rejects them
+    ("nan_and_infinity", b'{"low": -Infinity, "value": NaN}', None, True),
+    ("lone_surrogate", b'{"name": "\\ud800"}', None, True),
+    (
+        "invalid_schema_reference",
+        {"$schema": _UNREACHABLE_SCHEMA_URL, "name": "test"},
+        None,
+        False,
+    ),
+    ("json_array_non_strict", [{"name": "item1"}, {"name": "item2"}], False, True),
+    ("json_array_strict", [{"name": "item1"}, {"name": "item2"}], True, False),
+]
+
+
+@pytest.fixture(scope="module")
+def team_schema(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """
+    Write a team schema whose members $ref a separate definitions schema.
+
+    Both files are written once per module, and the team schema URL is returned.
+    """
+    schema_dir = tmp_path_factory.mktemp("schemas")
+    def_schema = schema_dir / "definitions.json"
+    def_schema.write_bytes(_PERSON_DEFINITIONS)
+    main_schema = schema_dir / "team.json"
+    main_schema.write_text(
+        json.dumps(
+            {
+                "$schema": "https://json-schema.org/draft/2019-09/schema",
+                "$id": "https://example.com/team.json",
+                "type": "object",
+                "properties": {
+                    "team_name": {"type": "string"},
+                    "members": {
+                        "type": "array",
+                        "items": {"$ref": f"file://{def_schema}#/definitions/person"},
+                    },
+                },
+                "required": ["team_name", "members"],
+            }
+        )
+    )
+    return f"file://{main_schema}"
 
 
 class TestValidateJsonFile:
     """Test the validate_json_file function."""
 
-    def test_valid_json_with_schema(self) -> None:
-        """Test validation of a valid JSON file with proper schema."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(
-                {
-                    "$schema": "http://json-schema.org/draft-07/schema#",
-                    "type": "object",
-                    "properties": {"name": {"type": "string"}},
-                },
-                f,
-            )
-            f.flush()
+    @pytest.mark.parametrize(
+        "document,strict,expected",
+        [pytest.param(*case, id=name) for name, *case in CASES],
+    )
+    @responses.activate
+    def test_check_document(
+        self, document: Any, strict: Optional[bool], expected: bool
+    ) -> None:
+        """Test the outcome of checking each document in CASES."""
+        responses.get(
+            _UNREACHABLE_SCHEMA_URL,
+            body=requests.ConnectionError("Name or service not known"),
+        )
+        if strict is None:
+            result, _ = _check_document(document)
+        else:
+            result, _ = _check_document(document, strict=strict)
+
+        assert result is expected
+
+    def test_schema_with_env_vars(self, tmp_path: Path) -> None:
+        """Test validation with schema path containing environment variables."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_bytes(_NAME_ONLY_SCHEMA)
+        data_file = tmp_path / "data.json"
+        data_file.write_bytes(_ENV_VAR_DOCUMENT)
 
-            result = validate_json_file(Path(f.name))
-            Path(f.name).unlink()
+        # Set environment variable to the schema's directory
+        with patch.dict("os.environ", {"SCHEMA_DIR": str(tmp_path)}):
+            result = validate_json_file(data_file, expand_env_vars=True)
 
         assert result is True
 
-    def test_json_without_schema(self) -> None:
-        """Test validation of JSON file without $schema key (default behavior)."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump({"name": "test"}, f)
-            f.flush()
+    def test_schema_with_env_vars_changed(self, tmp_path: Path) -> None:
+        """Test that a changed environment variable is expanded again."""
+        strict_schema = json.dumps({"required": ["missing"]}).encode()
+        for name, schema in (("valid", _NAME_ONLY_SCHEMA), ("invalid", strict_schema)):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "schema.json").write_bytes(schema)
+        data_file = tmp_path / "data.json"
+        data_file.write_bytes(_ENV_VAR_DOCUMENT)
 
-            result = validate_json_file(Path(f.name))
-            Path(f.name).unlink()
+        results = []
+        for name in ("valid", "invalid"):
+            with patch.dict("os.environ", {"SCHEMA_DIR": str(tmp_path / name)}):
+                results.append(validate_json_file(data_file, expand_env_vars=True))
 
-        assert result is True  # Default behavior is to gracefully skip
+        assert results == [True, False]
 
-    def test_json_without_schema_non_strict(self) -> None:
-        """Test validation of JSON file without $schema key in non-strict mode."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump({"name": "test"}, f)
-            f.flush()
+    def test_nonexistent_file(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test validation of a file that does not exist."""
+        result = validate_json_file(Path("nonexistent.json"))
 
-            result = validate_json_file(Path(f.name), strict=False)
-            Path(f.name).unlink()
+        assert result is False
+        assert capsys.readouterr().out == "❌ nonexistent.json: File not found\n"
 
-        assert result is True
+    def test_large_json_file(self, tmp_path: Path) -> None:
+        """Test validation of a JSON file large enough to be memory-mapped."""
+        data_file = tmp_path / "data.json"
+        data_file.write_text(
+            json.dumps(
+                {
+                    "$schema": "http://json-schema.org/draft-07/schema#",
+                    "enum": ["x" * 100] * 1000,  # Well over 64 KiB
+                }
+            )
+        )
 
-    def test_json_without_schema_strict(self) -> None:
-        """Test validation of JSON file without $schema key in strict mode."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump({"name": "test"}, f)
-            f.flush()
+        with patch("check_json_schema_meta.mmap.mmap", wraps=mmap.mmap) as mapped:
+            result = validate_json_file(data_file)
 
-            result = validate_json_file(Path(f.name), strict=True)
-            Path(f.name).unlink()
+        assert result is True
+        mapped.assert_called_once()
+
+    def test_large_json_stream_read_from_position(self, tmp_path: Path) -> None:
+        """Test that a memory-mapped stream is read from its current position."""
+        document = json.dumps(
+            {
+                "$schema": "http://json-schema.org/draft-07/schema#",
+                "enum": ["x" * 100] * 1000,  # Well over 64 KiB
+            }
+        )
+        data_file = tmp_path / "data.bin"
+        data_file.write_bytes(b"not json" + document.encode())
 
-        assert result is False
+        with data_file.open("rb") as f:
+            f.seek(len(b"not json"))
+            result, message = _check_json_stream(f, "data.bin")
 
-    def test_schema_with_env_vars(self) -> None:
-        """Test validation with schema path containing environment variables."""
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".json", delete=False
-        ) as schema_file:
-            schema_data = {
-                "$schema": "https://json-schema.org/draft/2019-09/schema",
-                "type": "object",
-                "properties": {"name": {"type": "string"}},
-                "additionalProperties": False,
-            }
-            json.dump(schema_data, schema_file)
-            schema_file.flush()
-
-            # Set environment variable to the schema's directory
-            schema_dir = str(Path(schema_file.name).parent)
-            schema_filename = str(Path(schema_file.name).name)
-            with patch.dict("os.environ", {"SCHEMA_DIR": schema_dir}):
-                with tempfile.NamedTemporaryFile(
-                    mode="w", suffix=".json", delete=False
-                ) as data_file:
-                    json.dump(
-                        {
-                            "$schema": f"file:///${{SCHEMA_DIR}}/{schema_filename}",
-                            "name": "test value",
-                        },
-                        data_file,
-                    )
-                    data_file.flush()
-
-                    result = validate_json_file(
-                        Path(data_file.name), expand_env_vars=True
-                    )
-                    Path(data_file.name).unlink()
-
-            Path(schema_file.name).unlink()
+        assert result is True, message
 
-        assert result is True
+    def test_non_string_schema_reference(self) -> None:
+        """Test that a non-string $schema is reported instead of raising."""
+        result, message = _check_document({"$schema": 42, "name": "test"})
 
-    def test_invalid_json(self) -> None:
-        """Test validation of invalid JSON file."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            f.write("invalid json content")
-            f.flush()
+        assert result is False
+        assert message == "❌ test.json: '$schema' must be a string"
 
-            result = validate_json_file(Path(f.name))
-            Path(f.name).unlink()
+    def test_non_json_leading_byte(self) -> None:
+        """Test that a document which cannot start a JSON value is rejected."""
+        result, message = _check_document(b'\n<?xml version="1.0"?>')
 
         assert result is False
+        assert message == (
+            "❌ test.json: Invalid JSON - unexpected character '<' "
+            "at the start of the document"
+        )
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [(18446744073709551617, True), (18446744073709551618, False)],
+    )
+    def test_large_integer_compared_exactly(
+        self, tmp_path: Path, value: int, expected: bool
+    ) -> None:
+        """Test that integers too wide for 64 bits are not rounded to floats."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(
+            json.dumps({"properties": {"id": {"maximum": 18446744073709551617}}})
+        )
+
+        result, message = _check_document(
+            b'{"$schema": "file://%s", "id": %d}' % (str(schema_file).encode(), value)
+        )
+
+        assert result is expected
+        if not expected:
+            assert message == (
+                "❌ test.json: Invalid value at 'id' - 18446744073709551618 "
+                "is greater than the maximum of 18446744073709551617"
+            )
+
+    def test_schema_property_not_rejected(self, tmp_path: Path) -> None:
+        """Test that $schema property itself is not rejected as additional property."""
+        # First create a strict schema that doesn't allow additional properties
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_bytes(_NAME_ONLY_SCHEMA)
 
-    def test_invalid_schema_reference(self) -> None:
-        """Test validation with invalid schema reference."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(
+        # Now create a JSON document that references this strict schema
+        data_file = tmp_path / "data.json"
+        data_file.write_text(
+            json.dumps(
                 {
-                    "$schema": "https://invalid-schema-url.com/nonexistent.json",
-                    "name": "test",
-                },
-                f,
+                    "$schema": f"file://{schema_file}",
+                    "name": "test value",  # Only this property should be allowed
+                }
             )
-            f.flush()
+        )
 
-            result = validate_json_file(Path(f.name))
-            Path(f.name).unlink()
+        # This should pass because $schema is excluded from validation
+        result = validate_json_file(data_file)
 
-        assert result is False
+        assert result is True
 
-    def test_schema_property_not_rejected(self) -> None:
-        """Test that $schema property itself is not rejected as additional property."""
-        # First create a strict schema that doesn't allow additional properties
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".json", delete=False
-        ) as schema_file:
-            schema_data = {
-                "$schema": "https://json-schema.org/draft/2019-09/schema",
-                "type": "object",
-                "properties": {"name": {"type": "string"}},
-                "additionalProperties": False,
-            }
-            json.dump(schema_data, schema_file)
-            schema_file.flush()
-            schema_url = f"file://{schema_file.name}"
-
-            # Now create a JSON document that references this strict schema
-            with tempfile.NamedTemporaryFile(
-                mode="w", suffix=".json", delete=False
-            ) as data_file:
-                json.dump(
-                    {
-                        "$schema": schema_url,
-                        "name": "test value",  # Only this property should be allowed
-                    },
-                    data_file,
+    def test_shared_schema_loaded_once(self, tmp_path: Path) -> None:
+        """Test that files sharing a $schema only load the schema once."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(
+            json.dumps(
+                {
+                    "$schema": "https://json-schema.org/draft/2019-09/schema",
+                    "type": "object",
+                    "properties": {"name": {"type": "string"}},
+                }
+            )
+        )
+
+        results = []
+        with patch(
+            "check_jsonschema.schema_loader.SchemaLoader", wraps=SchemaLoader
+        ) as loader:
+            for name in ("first", "second"):
+                data_file = tmp_path / f"{name}.json"
+                data_file.write_text(
+                    json.dumps({"$schema": f"file://{schema_file}", "name": name})
                 )
-                data_file.flush()
 
-                # This should pass because $schema is excluded from validation
-                result = validate_json_file(Path(data_file.name))
-                Path(data_file.name).unlink()
+                results.append(validate_json_file(data_file))
+
+        assert results == [True, True]
+        assert loader.call_count == 1
+
+    def test_passing_result_cached(self, tmp_path: Path) -> None:
+        """Test that files which already passed are not validated again."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_bytes(_OBJECT_SCHEMA)
+        data_file = tmp_path / "data.json"
+        data_file.write_text(json.dumps({"$schema": f"file://{schema_file}"}))
+
+        with patch(
+            "check_json_schema_meta._get_validator", wraps=_get_validator
+        ) as get_validator:
+            results = [
+                validate_json_file(data_file),
+                validate_json_file(data_file),
+                validate_json_file(data_file, disable_cache=True),
+            ]
+
+        assert results == [True, True, True]
+        # Validated the first time, and again only when caching is disabled
+        assert get_validator.call_count == 2
+
+    def test_failing_result_not_cached(self, tmp_path: Path) -> None:
+        """Test that files which failed validation are validated again."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(json.dumps({"type": "object", "required": ["name"]}))
+        data_file = tmp_path / "data.json"
+        data_file.write_text(json.dumps({"$schema": f"file://{schema_file}"}))
+
+        results = [validate_json_file(data_file), validate_json_file(data_file)]
+
+        assert results == [False, False]
+
+    def test_passing_result_invalidated_by_referenced_schema(
+        self, tmp_path: Path
+    ) -> None:
+        """Test that editing a schema pulled in through $ref invalidates passes."""
+        def_schema = tmp_path / "definitions.json"
+        def_schema.write_text(
+            json.dumps({"definitions": {"person": {"type": "object"}}})
+        )
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(
+            json.dumps({"$ref": f"file://{def_schema}#/definitions/person"})
+        )
+        data_file = tmp_path / "data.json"
+        data_file.write_text(
+            json.dumps({"$schema": f"file://{schema_file}", "name": "Alice"})
+        )
+
+        assert validate_json_file(data_file)
+
+        def_schema.write_text(
+            json.dumps(
+                {
+                    "definitions": {
+                        "person": {"type": "object", "required": ["name", "age"]}
+                    }
+                }
+            )
+        )
+        # Start over as a new run would, keeping only the on-disk caches
+        for cached in (_get_schema_loader, _get_schema_digest, _get_validator):
+            cached.cache_clear()
 
-            Path(schema_file.name).unlink()
+        assert not validate_json_file(data_file)
 
-        assert result is True
+    def test_passing_result_invalidated_by_upgrade(self, tmp_path: Path) -> None:
+        """Test that results recorded by other library versions are not reused."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_bytes(_OBJECT_SCHEMA)
+        data_file = tmp_path / "data.json"
+        data_file.write_text(json.dumps({"$schema": f"file://{schema_file}"}))
+
+        assert validate_json_file(data_file)
+
+        _get_schema_digest.cache_clear()
+        with (
+            patch(
+                "check_json_schema_meta._validation_environment",
+                return_value=b'{"versions": {"jsonschema": "99.0.0"}}',
+            ),
+            patch(
+                "check_json_schema_meta._get_validator", wraps=_get_validator
+            ) as get_validator,
+        ):
+            assert validate_json_file(data_file)
+
+        get_validator.assert_called_once()
+
+    def test_passing_result_cached_with_wide_integer(self, tmp_path: Path) -> None:
+        """Test that integers wider than 64 bits in a schema do not fail the file."""
+        schema_file = tmp_path / "schema.yaml"
+        schema_file.write_text(
+            "properties:\n  id:\n    maximum: 18446744073709551616\n"
+        )
+        data_file = tmp_path / "data.json"
+        data_file.write_text(json.dumps({"$schema": f"file://{schema_file}", "id": 1}))
+
+        with patch(
+            "check_json_schema_meta._get_validator", wraps=_get_validator
+        ) as get_validator:
+            results = [validate_json_file(data_file), validate_json_file(data_file)]
+
+        assert results == [True, True]
+        # The second check is answered by the results cache
+        assert get_validator.call_count == 1
+
+    def test_metaschema_reference_uses_bundled_schema(self, tmp_path: Path) -> None:
+        """Test that meta-schema references are validated without downloading."""
+        data_file = tmp_path / "data.json"
+        data_file.write_text(
+            json.dumps(
+                {
+                    "$schema": "https://json-schema.org/draft/2020-12/schema",
+                    "type": 5,  # Not a valid schema type
+                }
+            )
+        )
 
-    def test_schema_store_host_json_with_refs(self) -> None:
+        with patch(
+            "check_jsonschema.schema_loader.SchemaLoader", wraps=SchemaLoader
+        ) as loader:
+            result = validate_json_file(data_file)
+
+        assert result is False
+        loader.assert_not_called()
+
+    @pytest.mark.network
+    def test_schema_store_host_json_with_refs(self, tmp_path: Path) -> None:
         """Test validation of host.json with schema store schema that contains $ref."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(
+        data_file = tmp_path / "host.json"
+        data_file.write_text(
+            json.dumps(
                 {
                     "$schema": "https://www.schemastore.org/schemas/json/host.json",
                     "version": "2.0",
-                },
-                f,
+                }
             )
-            f.flush()
+        )
 
-            result = validate_json_file(Path(f.name))
-            Path(f.name).unlink()
+        result = validate_json_file(data_file)
 
         assert result is True
 
-    def test_schema_store_package_json_with_refs(self) -> None:
+    @pytest.mark.network
+    def test_schema_store_package_json_with_refs(self, tmp_path: Path) -> None:
         """Test validation of package.json with schema store schema that contains $ref.
 
         Uses a real production package.json configuration to test $ref resolution.
         """
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(
+        data_file = tmp_path / "package.json"
+        data_file.write_text(
+            json.dumps(
                 {
                     "$schema": "https://www.schemastore.org/schemas/json/package.json",
                     "name": "test-package",
@@ -200,197 +479,129 @@ class TestValidateJsonFile:
                     "keywords": ["test"],
                     "author": "Test Author",
                     "license": "MIT",
-                },
-                f,
+                }
             )
-            f.flush()
+        )
 
-            result = validate_json_file(Path(f.name))
-            Path(f.name).unlink()
+        result = validate_json_file(data_file)
 
         assert result is True
 
-    def test_local_schema_with_refs(self) -> None:
-        """Test validation with local schema using $ref to demonstrate ref resolution.
+    @responses.activate
+    def test_remote_schema_with_refs(self, tmp_path: Path) -> None:
+        """Test validation against a remote schema whose $ref is also remote.
 
-        This test creates two schema files where one references the other via $ref.
-        Without proper $ref resolution, validation would fail.
+        Both schemas are served by a mocked HTTP layer, so this covers downloading
+        and $ref resolution without reaching the network.
         """
-        # Create a definitions schema file
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".json", delete=False
-        ) as def_schema:
-            definitions = {
+        responses.get(
+            "https://example.com/schemas/definitions.json", body=_PERSON_DEFINITIONS
+        )
+        responses.get(
+            "https://example.com/schemas/team.json",
+            json={
                 "$schema": "https://json-schema.org/draft/2019-09/schema",
-                "$id": "https://example.com/definitions.json",
-                "definitions": {
-                    "person": {
-                        "type": "object",
-                        "properties": {
-                            "name": {"type": "string"},
-                            "age": {"type": "integer", "minimum": 0},
-                        },
-                        "required": ["name", "age"],
-                    }
-                },
-            }
-            json.dump(definitions, def_schema)
-            def_schema.flush()
-            def_schema_url = f"file://{def_schema.name}"
-
-            # Create a main schema that references the definitions
-            with tempfile.NamedTemporaryFile(
-                mode="w", suffix=".json", delete=False
-            ) as main_schema:
-                main_schema_data = {
-                    "$schema": "https://json-schema.org/draft/2019-09/schema",
-                    "$id": "https://example.com/team.json",
-                    "type": "object",
-                    "properties": {
-                        "team_name": {"type": "string"},
-                        "members": {
-                            "type": "array",
-                            "items": {"$ref": f"{def_schema_url}#/definitions/person"},
-                        },
+                "type": "object",
+                "properties": {
+                    "members": {
+                        "type": "array",
+                        "items": {"$ref": "definitions.json#/definitions/person"},
                     },
-                    "required": ["team_name", "members"],
+                },
+            },
+        )
+        data_file = tmp_path / "data.json"
+        data_file.write_text(
+            json.dumps(
+                {
+                    "$schema": "https://example.com/schemas/team.json",
+                    "members": [{"name": "Alice", "age": 30}, {"name": "Bob"}],
                 }
-                json.dump(main_schema_data, main_schema)
-                main_schema.flush()
-                main_schema_url = f"file://{main_schema.name}"
-
-                # Create a test JSON file that should validate against the schema
-                with tempfile.NamedTemporaryFile(
-                    mode="w", suffix=".json", delete=False
-                ) as test_file:
-                    test_data = {
-                        "$schema": main_schema_url,
-                        "team_name": "Development Team",
-                        "members": [
-                            {"name": "Alice", "age": 30},
-                            {"name": "Bob", "age": 25},
-                        ],
-                    }
-                    json.dump(test_data, test_file)
-                    test_file.flush()
+            )
+        )
 
-                    # This should pass because $ref resolution works
-                    result = validate_json_file(Path(test_file.name))
-                    Path(test_file.name).unlink()
+        result = validate_json_file(data_file)
+
+        assert result is False  # Bob is missing the required 'age' field
+
+    @responses.activate
+    def test_remote_schema_download_failure(self, tmp_path: Path) -> None:
+        """Test that a schema which cannot be downloaded fails validation."""
+        responses.get("https://example.com/schemas/missing.json", status=404)
+        data_file = tmp_path / "data.json"
+        data_file.write_text(
+            json.dumps({"$schema": "https://example.com/schemas/missing.json"})
+        )
+
+        result = validate_json_file(data_file)
+
+        assert result is False
+
+    def test_local_schema_with_refs(self, tmp_path: Path, team_schema: str) -> None:
+        """Test validation with local schema using $ref to demonstrate ref resolution.
+
+        The team schema references a separate definitions schema via $ref.
+        Without proper $ref resolution, validation would fail.
+        """
+        # Create a test JSON file that should validate against the schema
+        test_file = tmp_path / "data.json"
+        test_file.write_text(
+            json.dumps(
+                {
+                    "$schema": team_schema,
+                    "team_name": "Development Team",
+                    "members": [
+                        {"name": "Alice", "age": 30},
+                        {"name": "Bob", "age": 25},
+                    ],
+                }
+            )
+        )
 
-                Path(main_schema.name).unlink()
-            Path(def_schema.name).unlink()
+        # This should pass because $ref resolution works
+        result = validate_json_file(test_file)
 
         assert result is True
 
-    def test_local_schema_with_refs_validation_failure(self) -> None:
+    def test_local_schema_with_refs_validation_failure(
+        self, tmp_path: Path, team_schema: str
+    ) -> None:
         """Test that $ref resolution properly validates and catches errors.
 
         This test demonstrates that with proper $ref resolution, validation errors
         in referenced schemas are correctly detected.
         """
-        # Create a definitions schema file
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".json", delete=False
-        ) as def_schema:
-            definitions = {
-                "$schema": "https://json-schema.org/draft/2019-09/schema",
-                "$id": "https://example.com/definitions.json",
-                "definitions": {
-                    "person": {
-                        "type": "object",
-                        "properties": {
-                            "name": {"type": "string"},
-                            "age": {"type": "integer", "minimum": 0},
-                        },
-                        "required": ["name", "age"],
-                    }
-                },
-            }
-            json.dump(definitions, def_schema)
-            def_schema.flush()
-            def_schema_url = f"file://{def_schema.name}"
-
-            # Create a main schema that references the definitions
-            with tempfile.NamedTemporaryFile(
-                mode="w", suffix=".json", delete=False
-            ) as main_schema:
-                main_schema_data = {
-                    "$schema": "https://json-schema.org/draft/2019-09/schema",
-                    "$id": "https://example.com/team.json",
-                    "type": "object",
-                    "properties": {
-                        "team_name": {"type": "string"},
-                        "members": {
-                            "type": "array",
-                            "items": {"$ref": f"{def_schema_url}#/definitions/person"},
-                        },
-                    },
-                    "required": ["team_name", "members"],
+        # Create a test JSON file with invalid data (missing required field)
+        test_file = tmp_path / "data.json"
+        test_file.write_text(
+            json.dumps(
+                {
+                    "$schema": team_schema,
+                    "team_name": "Development Team",
+                    "members": [
+                        {"name": "Alice", "age": 30},
+                        {"name": "Bob"},  # Missing required 'age' field
+                    ],
                 }
-                json.dump(main_schema_data, main_schema)
-                main_schema.flush()
-                main_schema_url = f"file://{main_schema.name}"
-
-                # Create a test JSON file with invalid data (missing required field)
-                with tempfile.NamedTemporaryFile(
-                    mode="w", suffix=".json", delete=False
-                ) as test_file:
-                    test_data = {
-                        "$schema": main_schema_url,
-                        "team_name": "Development Team",
-                        "members": [
-                            {"name": "Alice", "age": 30},
-                            {"name": "Bob"},  # Missing required 'age' field
-                        ],
-                    }
-                    json.dump(test_data, test_file)
-                    test_file.flush()
-
-                    # This should fail because of validation error in referenced schema
-                    result = validate_json_file(Path(test_file.name))
-                    Path(test_file.name).unlink()
+            )
+        )
 
-                Path(main_schema.name).unlink()
-            Path(def_schema.name).unlink()
+        # This should fail because of validation error in referenced schema
+        result = validate_json_file(test_file)
 
         assert result is False
 
-    def test_schema_with_env_vars_no_flag(self) -> None:
+    def test_schema_with_env_vars_no_flag(self, tmp_path: Path) -> None:
         """Test that env vars are not expanded when expand_env_vars is False."""
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".json", delete=False
-        ) as schema_file:
-            schema_data = {
-                "$schema": "https://json-schema.org/draft/2019-09/schema",
-                "type": "object",
-                "properties": {"name": {"type": "string"}},
-                "additionalProperties": False,
-            }
-            json.dump(schema_data, schema_file)
-            schema_file.flush()
-
-            # Set environment variable to the schema's directory
-            schema_dir = str(Path(schema_file.name).parent)
-            schema_filename = str(Path(schema_file.name).name)
-            with patch.dict("os.environ", {"SCHEMA_DIR": schema_dir}):
-                with tempfile.NamedTemporaryFile(
-                    mode="w", suffix=".json", delete=False
-                ) as data_file:
-                    json.dump(
-                        {
-                            "$schema": f"file:///${{SCHEMA_DIR}}/{schema_filename}",
-                            "name": "test value",
-                        },
-                        data_file,
-                    )
-                    data_file.flush()
-
-                    # expand_env_vars is False by default, so this should fail
-                    result = validate_json_file(Path(data_file.name))
-                    Path(data_file.name).unlink()
-
-            Path(schema_file.name).unlink()
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_bytes(_NAME_ONLY_SCHEMA)
+        data_file = tmp_path / "data.json"
+        data_file.write_bytes(_ENV_VAR_DOCUMENT)
+
+        # Set environment variable to the schema's directory
+        with patch.dict("os.environ", {"SCHEMA_DIR": str(tmp_path)}):
+            # expand_env_vars is False by default, so this should fail
+            result = validate_json_file(data_file)
 
         assert result is False
 
@@ -398,171 +609,196 @@ class TestValidateJsonFile:
 class TestMain:
     """Test the main function."""
 
-    def test_main_with_valid_files(self) -> None:
+    def test_main_with_valid_files(self, tmp_path: Path) -> None:
         """Test main function with valid JSON files."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f1:
-            json.dump(
-                {
-                    "$schema": "http://json-schema.org/draft-07/schema#",
-                    "type": "string",
-                },
-                f1,
-            )
-            f1.flush()
-
-            with patch("sys.argv", ["check_json_schema_meta", f1.name]):
-                result = main()
+        f1 = tmp_path / "valid.json"
+        f1.write_bytes(_DRAFT07_STRING)
 
-            Path(f1.name).unlink()
+        result = main([str(f1)])
 
         assert result == 0
 
-    def test_main_with_invalid_files(self) -> None:
+    def test_main_with_invalid_files(self, tmp_path: Path) -> None:
         """Test main function with invalid JSON files (default behavior)."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f1:
-            json.dump({"name": "test"}, f1)  # No $schema
-            f1.flush()
-
-            with patch("sys.argv", ["check_json_schema_meta", f1.name]):
-                result = main()
+        f1 = tmp_path / "invalid.json"
+        f1.write_bytes(_NO_SCHEMA)  # No $schema
 
-            Path(f1.name).unlink()
+        result = main([str(f1)])
 
         assert result == 0  # Default behavior is to gracefully skip
 
     def test_main_with_nonexistent_file(self) -> None:
         """Test main function with nonexistent file."""
-        with patch("sys.argv", ["check_json_schema_meta", "nonexistent.json"]):
-            result = main()
+        result = main(["nonexistent.json"])
 
         assert result == 1
 
-    def test_main_with_non_json_file(self) -> None:
+    def test_main_with_non_json_file(self, tmp_path: Path) -> None:
         """Test main function with non-JSON file."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f1:
-            f1.write("not json")
-            f1.flush()
+        f1 = tmp_path / "file.txt"
+        f1.write_text("not json")
 
-            with patch("sys.argv", ["check_json_schema_meta", f1.name]):
-                result = main()
-
-            Path(f1.name).unlink()
+        result = main([str(f1)])
 
         assert result == 1  # Should fail on invalid JSON files
 
-    def test_main_with_json_file_no_extension(self) -> None:
+    def test_main_with_json_file_no_extension(self, tmp_path: Path) -> None:
         """Test main function with JSON file without .json extension."""
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".babelrc", delete=False
-        ) as f1:
-            json.dump(
+        f1 = tmp_path / ".babelrc"
+        f1.write_text(
+            json.dumps(
                 {
                     "$schema": "http://json-schema.org/draft-07/schema#",
                     "presets": ["@babel/preset-env"],
-                },
-                f1,
+                }
             )
-            f1.flush()
-
-            with patch("sys.argv", ["check_json_schema_meta", f1.name]):
-                result = main()
+        )
 
-            Path(f1.name).unlink()
+        result = main([str(f1)])
 
         assert result == 0  # Should succeed and validate the JSON file
 
-    def test_main_with_strict_flag(self) -> None:
+    def test_main_with_strict_flag(self, tmp_path: Path) -> None:
         """Test main function with --strict flag and missing schema."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f1:
-            json.dump({"name": "test"}, f1)  # No $schema
-            f1.flush()
-
-            with patch("sys.argv", ["check_json_schema_meta", "--strict", f1.name]):
-                result = main()
+        f1 = tmp_path / "data.json"
+        f1.write_bytes(_NO_SCHEMA)  # No $schema
 
-            Path(f1.name).unlink()
+        result = main(["--strict", str(f1)])
 
         assert result == 1  # Should fail with --strict
 
-    def test_main_without_strict_flag(self) -> None:
+    def test_main_without_strict_flag(self, tmp_path: Path) -> None:
         """Test main function without --strict flag and missing schema."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f1:
-            json.dump({"name": "test"}, f1)  # No $schema
-            f1.flush()
+        f1 = tmp_path / "data.json"
+        f1.write_bytes(_NO_SCHEMA)  # No $schema
 
-            with patch("sys.argv", ["check_json_schema_meta", f1.name]):
-                result = main()
-
-            Path(f1.name).unlink()
+        result = main([str(f1)])
 
         assert result == 0  # Should succeed without --strict
 
-    def test_main_with_mixed_files(self) -> None:
-        """Test main function with mix of valid and invalid files."""
-        with (
-            tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f1,
-            tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f2,
-        ):
-            # Valid file
-            json.dump(
-                {
-                    "$schema": "http://json-schema.org/draft-07/schema#",
-                    "type": "string",
-                },
-                f1,
-            )
-            f1.flush()
+    def test_main_with_no_cache_flag(self, tmp_path: Path) -> None:
+        """Test main function with --no-cache flag disables the schema cache."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_bytes(_OBJECT_SCHEMA)
+        f1 = tmp_path / "data.json"
+        f1.write_text(json.dumps({"$schema": f"file://{schema_file}"}))
+
+        with patch(
+            "check_jsonschema.schema_loader.SchemaLoader", wraps=SchemaLoader
+        ) as loader:
+            result = main(["--no-cache", str(f1)])
+
+        assert result == 0
+        loader.assert_called_once_with(f"file://{schema_file}", disable_cache=True)
 
-            # Invalid file (no schema)
-            json.dump({"name": "test"}, f2)
-            f2.flush()
+    def test_main_with_mixed_files(self, tmp_path: Path) -> None:
+        """Test main function with mix of valid and invalid files."""
+        # Valid file
+        f1 = tmp_path / "valid.json"
+        f1.write_bytes(_DRAFT07_STRING)
 
-            with patch("sys.argv", ["check_json_schema_meta", f1.name, f2.name]):
-                result = main()
+        # Invalid file (no schema)
+        f2 = tmp_path / "invalid.json"
+        f2.write_bytes(_NO_SCHEMA)
 
-            Path(f1.name).unlink()
-            Path(f2.name).unlink()
+        result = main([str(f1), str(f2)])
 
         assert result == 0  # Should succeed in non-strict mode
 
-    def test_renovate_json_with_schema(self) -> None:
-        """Test validation of renovate.json with proper schema."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(
+    def test_main_with_repeated_file(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test main function checks a file passed twice only once."""
+        f1 = tmp_path / "data.json"
+        f1.write_bytes(_NO_SCHEMA)  # No $schema
+
+        with patch(
+            "check_json_schema_meta._check_json_file", wraps=_check_json_file
+        ) as check:
+            result = main(["--strict", str(f1), str(f1)])
+
+        assert result == 1
+        check.assert_called_once()
+        assert (
+            capsys.readouterr().out.splitlines()
+            == [f"❌ {f1}: Missing '$schema' key"] * 2
+        )
+
+    def test_main_with_jobs_flag(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test main function with --jobs validates in parallel, in order."""
+        paths = []
+        for i in range(4):
+            path = tmp_path / f"{i}.json"
+            # Alternate files without $schema and invalid JSON
+            path.write_bytes(_NO_SCHEMA if i % 2 == 0 else b"not json")
+            paths.append(str(path))
+
+        result = main(["--strict", "-j2", *paths])
+
+        assert result == 1
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 4
+        for i, (name, line) in enumerate(zip(paths, lines)):
+            if i % 2 == 0:
+                assert line == f"❌ {name}: Missing '$schema' key"
+            else:
+                assert line.startswith(f"❌ {name}: Invalid JSON - ")
+
+    def test_main_with_jobs_flag_few_files(self, tmp_path: Path) -> None:
+        """Test main function with --jobs checks a handful of files serially."""
+        files = []
+        for name in ("a.json", "b.json", "c.json"):
+            path = tmp_path / name
+            path.write_bytes(_NO_SCHEMA)
+            files.append(str(path))
+
+        with patch("check_json_schema_meta.ProcessPoolExecutor") as executor:
+            result = main(["--jobs", "2", *files])
+
+        assert result == 0
+        executor.assert_not_called()
+
+    def test_shard_by_schema_groups_shared_schemas(self, tmp_path: Path) -> None:
+        """Test that files sharing a $schema are sharded onto the same worker."""
+        paths = []
+        for i, schema in enumerate(("a.json", "b.json", "a.json", "b.json")):
+            path = tmp_path / f"{i}.json"
+            path.write_text(json.dumps({"$schema": f"file:///schemas/{schema}"}))
+            paths.append(str(path))
+
+        shards = _shard_by_schema(paths, jobs=2)
+
+        assert shards == [[0, 2], [1, 3]]
+
+    def test_renovate_json_with_schema(self, tmp_path: Path) -> None:
+        """Test validation of renovate.json against check-jsonschema's vendored copy."""
+        data_file = tmp_path / "renovate.json"
+        data_file.write_text(
+            json.dumps(
                 {
                     "$schema": "https://docs.renovatebot.com/renovate-schema.json",
                     "extends": ["config:recommended"],
                     "packageRules": [
                         {"matchUpdateTypes": ["minor", "patch"], "automerge": True}
                     ],
-                },
-                f,
+                }
             )
-            f.flush()
+        )
 
-            result = validate_json_file(Path(f.name))
-            Path(f.name).unlink()
+        with patch(
+            "check_jsonschema.schema_loader.SchemaLoader", wraps=SchemaLoader
+        ) as loader:
+            result = validate_json_file(data_file)
 
         assert result is True
+        loader.assert_not_called()
 
-    def test_json_array_non_strict(self) -> None:
-        """Test validation of JSON array in non-strict mode."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump([{"name": "item1"}, {"name": "item2"}], f)
-            f.flush()
-
-            result = validate_json_file(Path(f.name), strict=False)
-            Path(f.name).unlink()
-
-        assert result is True
-
-    def test_json_array_strict(self) -> None:
-        """Test validation of JSON array in strict mode."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump([{"name": "item1"}, {"name": "item2"}], f)
-            f.flush()
-
-            result = validate_json_file(Path(f.name), strict=True)
-            Path(f.name).unlink()
+    def test_json_array_strict_not_parsed(self) -> None:
+        """Test that strict mode rejects a JSON array from its first bytes."""
+        # Truncated, so parsing it would report invalid JSON instead
+        result, message = _check_document(b'  \n[{"name": "item1"}, ', strict=True)
 
         assert result is False
+        assert message == "❌ test.json: JSON array does not support '$schema' key"